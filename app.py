@@ -1,19 +1,114 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import ee
 import streamlit as st
 from streamlit_folium import st_folium
 
-from src.maps import FoliumMap
+from src.maps import GEE_TILES_TTL, FoliumMap
 from src.data_params import GEEData
-from src.processing import LandcoverAnalyzer, LandcoverComparison, CarbonStockAnalyzer
 from src.verification import selected_bbox_too_large, selected_bbox_in_boundary
 
+# The app shows no Matplotlib windows, use the non-interactive Agg backend unless
+# MPLBACKEND is set. The processing module, and so pyplot, is only imported on submit
+os.environ.setdefault("MPLBACKEND", "Agg")
+
 MAP_CENTER = [-4.656, -50.94]
 MAP_ZOOM = 8
 MAX_ALLOWED_AREA_SIZE = 20.0
 BTN_LABEL = "Submit"
+OUTPUTS = ["LC 2000", "LC 2018", "Comparison", "SOC"]
+HISTOGRAM_TILES = 2
+EE_HIGH_VOLUME_URL = "https://earthengine-highvolume.googleapis.com"
+
+
+@st.cache_resource
+def _init_ee():
+    """Initializes GEE once per process instead of on every rerun."""
+    # The high-volume endpoint serves many concurrent requests
+    ee.Initialize(opt_url=EE_HIGH_VOLUME_URL)
+    return True
+
+
+# The map holds GEE tiles URLs, so it is rebuilt as often as they are refreshed
+@st.cache_resource(ttl=GEE_TILES_TTL)
+def _build_map(center, zoom):
+    """Builds and renders the map with its GEE layers, it only depends on constants."""
+    m = FoliumMap(center=list(center), zoom=zoom)
+
+    # Add layers, only the top one is shown initially since the opaque layers hide each other
+    m.add_gee_layer(dataset=GEEData("SOC-Stock-Change"), show=False)
+
+    glc_data = GEEData("Global-Land-Cover")
+    for year in ["2000", "2018"]:
+        m.add_gee_layer(dataset=glc_data, year=year, show=year == "2018")
+
+    m.add_layer_control()
+
+    # Render the map root once, st_folium is called with render=False so it skips the root
+    # render. It still renders the map and generates its Leaflet script on every rerun
+    m.get_root().render()
+    return m
+
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _lc_histograms(geom_wkb: bytes, years: tuple, _geometry: dict) -> dict:
+    """Calculates the land cover histograms of a geometry, cached by its WKB and the years."""
+    from src.processing import LandcoverAnalyzer
+
+    # All the years of a tile are reduced in the same GEE request
+    lc_analyzer = LandcoverAnalyzer(GEEData("Global-Land-Cover"))
+    return lc_analyzer.calculate_frequency_histograms(
+        geometry=_geometry, years=list(years), tiles=HISTOGRAM_TILES
+    )
+
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _soc_histogram(geom_wkb: bytes, _geometry: dict) -> dict:
+    """Calculates the SOC stock change histogram of a geometry, cached by its WKB."""
+    from src.processing import CarbonStockAnalyzer
+
+    soc_analyzer = CarbonStockAnalyzer(GEEData("SOC-Stock-Change"))
+    return soc_analyzer.calculate_frequency_histogram(geometry=_geometry)
+
 
-# Initialize GEE
-ee.Initialize()
+@st.cache_data(show_spinner=False)
+def _pie_fig(hist_items: tuple, palette_id: str):
+    """Builds the land cover pie chart of a histogram, given as sorted items."""
+    from src.processing import LandcoverAnalyzer
+
+    lc_analyzer = LandcoverAnalyzer(GEEData(palette_id), dict(hist_items))
+    return lc_analyzer.get_pie_chart_plotly(title="")
+
+
+@st.cache_data(show_spinner=False)
+def _comparison_fig(hist_items_2000: tuple, hist_items_2018: tuple, palette_id: str):
+    """Builds the land cover comparison chart of two histograms, given as sorted items."""
+    from src.processing import LandcoverComparison
+
+    dataset = GEEData(palette_id)
+    lc_comparison = LandcoverComparison(
+        dict(hist_items_2000), dict(hist_items_2018), dataset.class_colors, dataset.class_names
+    )
+    return lc_comparison.generate_comparison_chart(title="")
+
+
+@st.cache_data(show_spinner=False)
+def _stackbar_fig(hist_items: tuple):
+    """Builds the SOC stock change stacked bar chart of a histogram, given as sorted items."""
+    from src.processing import CarbonStockAnalyzer
+
+    soc_analyzer = CarbonStockAnalyzer(GEEData("SOC-Stock-Change"), dict(hist_items))
+    return soc_analyzer.get_stackbar_chart_plotly(title="")
+
+
+def _display_figs(figs, containers):
+    """Displays the (subheader, figure) pairs of each output in its containers."""
+    for name, (subheader, fig) in figs.items():
+        text_container, plot_container = containers[name]
+        text_container.subheader(subheader)
+        plot_container.plotly_chart(fig)
 
 
 # Create the Streamlit app and define the main code:
@@ -21,22 +116,23 @@ def main():
     st.set_page_config(
         page_title="science_project-demo", layout="wide", initial_sidebar_state="expanded"
     )
+    _init_ee()
     st.title("Science Project Demo")
 
     # Create the map
-    m = FoliumMap(center=MAP_CENTER, zoom=MAP_ZOOM)
-
-    # Add layers
-    soc_data = GEEData("SOC-Stock-Change")
-    m.add_gee_layer(dataset=soc_data)
+    m = _build_map(tuple(MAP_CENTER), MAP_ZOOM)
 
     glc_data = GEEData("Global-Land-Cover")
-    for year in ["2000", "2018"]:
-        m.add_gee_layer(dataset=glc_data, year=year)
-
-    m.add_layer_control()
 
-    output = st_folium(m, key="init", width=1200, height=600)
+    # Only drawing changes trigger a rerun, panning and zooming do not
+    output = st_folium(
+        m,
+        key="init",
+        width=1200,
+        height=600,
+        returned_objects=["all_drawings", "last_active_drawing"],
+        render=False,
+    )
 
     # Get the GeoJSON data of the selected area
     geojson = None
@@ -46,6 +142,9 @@ def main():
                 # get latest modified drawing
                 geojson = output["last_active_drawing"]
 
+    # Hash of the drawing, the figures of a submitted drawing are kept in the session state
+    geom_hash = hash(json.dumps(geojson, sort_keys=True))
+
     # ensure progress bar resides at top of sidebar and is invisible initially
     progress_bar = st.sidebar.progress(0)
     progress_bar.empty()
@@ -65,6 +164,13 @@ def main():
     text_container_soc = st.empty()
     plot_container_soc = st.empty()
 
+    containers = {
+        "LC 2000": (text_container_2000, plot_container_2000),
+        "LC 2018": (text_container_2018, plot_container_2018),
+        "Comparison": (text_container_comparison, plot_container_comparison),
+        "SOC": (text_container_soc, plot_container_soc),
+    }
+
     # Create the sidebar
     with st.sidebar.container():
         # Getting started
@@ -79,11 +185,14 @@ def main():
             unsafe_allow_html=True,
         )
 
+        # Select the outputs to compute
+        selected = st.multiselect("Outputs", OUTPUTS, default=OUTPUTS)
+
         # Add the button and its callback
         if st.button(
             BTN_LABEL,
             key="compute_zs",
-            disabled=False if geojson is not None else True,
+            disabled=False if geojson is not None and selected else True,
         ):
             # Check if the geometry is valid
             geometry = geojson["geometry"]
@@ -99,50 +208,73 @@ def main():
                     "Ensure to use the initial center view of the world for drawing your rectangle."
                 )
             else:
-                # Instantiate a LandcoverAnalyzer object with the GEEData object
-                lc_analyzer = LandcoverAnalyzer(glc_data)
+                # Deferred import, shapely is only needed once a region is submitted
+                from shapely.geometry import shape
 
-                # Calculate the frequency histogram for the year 2000
-                data_2000 = lc_analyzer.calculate_frequency_histogram(
-                    geometry=geometry, year="2000"
-                )
-                fig_2000 = lc_analyzer.get_pie_chart_plotly(title="")
+                # The geometry WKB is the cache key of the histograms
+                geom_wkb = shape(geometry).wkb
 
-                # Calculate the frequency histogram for the year 2018
-                data_2018 = lc_analyzer.calculate_frequency_histogram(
-                    geometry=geometry, year="2018"
+                # The comparison chart needs the histograms of both years
+                compute_2000 = "LC 2000" in selected or "Comparison" in selected
+                compute_2018 = "LC 2018" in selected or "Comparison" in selected
+
+                years = tuple(
+                    year
+                    for year, compute in (("2000", compute_2000), ("2018", compute_2018))
+                    if compute
                 )
-                fig_2018 = lc_analyzer.get_pie_chart_plotly(title="")
 
-                # Display the plots using Streamlit for the year 2000 and 2018
-                text_container_2000.subheader("Land Cover (2000)")
-                plot_container_2000.plotly_chart(fig_2000)
+                # Submit the independent GEE computations concurrently,
+                # each cached histogram call uses its own analyzer
+                with st.spinner("Computing..."), ThreadPoolExecutor(max_workers=2) as executor:
+                    if years:
+                        future_lc = executor.submit(_lc_histograms, geom_wkb, years, geometry)
+                    if "SOC" in selected:
+                        future_soc = executor.submit(_soc_histogram, geom_wkb, geometry)
 
-                text_container_2018.subheader("Land Cover (2018)")
-                plot_container_2018.plotly_chart(fig_2018)
+                # The histograms are passed to the cached figure builders as sorted items
+                if compute_2000:
+                    hist_items_2000 = tuple(sorted(future_lc.result()["2000"].items()))
+                if compute_2018:
+                    hist_items_2018 = tuple(sorted(future_lc.result()["2018"].items()))
 
-                # Instantiate a LandcoverComparison object
-                lc_comparison = LandcoverComparison(
-                    data_2000, data_2018, lc_analyzer.class_colors, lc_analyzer.class_names
-                )
+                # Generate the plots for the year 2000 and 2018
+                figs = {}
+                if "LC 2000" in selected:
+                    figs["LC 2000"] = (
+                        "Land Cover (2000)",
+                        _pie_fig(hist_items_2000, glc_data.dataset),
+                    )
 
-                # Generate the comparison chart
-                comparison_chart = lc_comparison.generate_comparison_chart(title="")
+                if "LC 2018" in selected:
+                    figs["LC 2018"] = (
+                        "Land Cover (2018)",
+                        _pie_fig(hist_items_2018, glc_data.dataset),
+                    )
 
-                # Display the Matplotlib figure within Streamlit using st.pyplot()
-                text_container_comparison.subheader("Landcover Change 2000-2018 (%)")
-                plot_container_comparison.plotly_chart(comparison_chart)
+                if "Comparison" in selected:
+                    # Generate the comparison chart
+                    figs["Comparison"] = (
+                        "Landcover Change 2000-2018 (%)",
+                        _comparison_fig(hist_items_2000, hist_items_2018, glc_data.dataset),
+                    )
 
-                # Instantiate a CarbonStockAnalyzer object with the GEEData object
-                soc_analyzer = CarbonStockAnalyzer(soc_data)
+                if "SOC" in selected:
+                    # Generate the plot of the frequency histogram using Plotly
+                    figs["SOC"] = (
+                        "SOC Stock Change",
+                        _stackbar_fig(tuple(sorted(future_soc.result().items()))),
+                    )
 
-                # Calculate the frequency histogram and generate the plot using Plotly
-                soc_data = soc_analyzer.calculate_frequency_histogram(geometry=geometry)
-                fig_soc = soc_analyzer.get_stackbar_chart_plotly(title="")
+                # Keep the figures until a new drawing arrives
+                st.session_state["_geom_hash"] = geom_hash
+                st.session_state["_figs"] = figs
+                _display_figs(figs, containers)
 
-                # Display the plot using Streamlit
-                text_container_soc.subheader("SOC Stock Change")
-                plot_container_soc.plotly_chart(fig_soc)
+        elif st.session_state.get("_geom_hash") == geom_hash:
+            # Nothing new was drawn, show the figures of the last submit that are still selected
+            figs = {k: v for k, v in st.session_state["_figs"].items() if k in selected}
+            _display_figs(figs, containers)
 
 
 if __name__ == "__main__":
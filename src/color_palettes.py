@@ -0,0 +1,138 @@
+# Dictionary to store land cover class names and colors, the single source for the SLD style,
+# the class colors and the class names of the Global Land Cover dataset.
+# Class IDs are ints, the string IDs returned by GEE are converted once at ingestion
+landcover_info = {
+    10: {"Landcover": "Cropland, rainfed", "Color": "#ffff64"},
+    11: {"Landcover": "Cropland, rainfed, herbaceous cover", "Color": "#ffff64"},
+    12: {"Landcover": "Cropland, rainfed, tree, or shrub cover", "Color": "#ffff00"},
+    20: {"Landcover": "Cropland, irrigated or post-flooding", "Color": "#aaf0f0"},
+    30: {
+        "Landcover": "Mosaic cropland (>50%) / natural vegetation "
+        "(tree, shrub, herbaceous cover) (<50%)",
+        "Color": "#dcf064",
+    },
+    40: {
+        "Landcover": "Mosaic natural vegetation "
+        "(tree, shrub, herbaceous cover) (>50%) / cropland (<50%)",
+        "Color": "#c8c864",
+    },
+    50: {
+        "Landcover": "Tree cover, broadleaved, evergreen, closed to open (>15%)",
+        "Color": "#006400",
+    },
+    60: {
+        "Landcover": "Tree cover, broadleaved, deciduous, closed to open (>15%)",
+        "Color": "#00a000",
+    },
+    61: {"Landcover": "Tree cover, broadleaved, deciduous, closed (>40%)", "Color": "#00a000"},
+    62: {"Landcover": "Tree cover, broadleaved, deciduous, open (15- 40%)", "Color": "#aac800"},
+    70: {
+        "Landcover": "Tree cover, needleleaved, evergreen, closed to open (>15%)",
+        "Color": "#003c00",
+    },
+    71: {"Landcover": "Tree cover, needleleaved, evergreen, closed (>40%)", "Color": "#003c00"},
+    72: {"Landcover": "Tree cover, needleleaved, evergreen, open (15-40%)", "Color": "#005000"},
+    80: {
+        "Landcover": "Tree cover, needleleaved, deciduous, closed to open (>15%)",
+        "Color": "#285000",
+    },
+    81: {"Landcover": "Tree cover, needleleaved, deciduous, closed (>40%)", "Color": "#285000"},
+    82: {"Landcover": "Tree cover, needleleaved, deciduous, open (15-40%)", "Color": "#286400"},
+    90: {
+        "Landcover": "Tree cover, mixed leaf type (broadleaved and needleleaved)",
+        "Color": "#788200",
+    },
+    100: {
+        "Landcover": "Mosaic tree and shrub (>50%) / herbaceous cover (<50%)",
+        "Color": "#8ca000",
+    },
+    110: {
+        "Landcover": "Mosaic herbaceous cover (>50%) / tree and shrub (<50%)",
+        "Color": "#be9600",
+    },
+    120: {"Landcover": "Shrubland", "Color": "#966400"},
+    121: {"Landcover": "Evergreen shrubland", "Color": "#966400"},
+    122: {"Landcover": "Deciduous shrubland", "Color": "#966400"},
+    130: {"Landcover": "Grassland", "Color": "#ffb432"},
+    140: {"Landcover": "Lichens and mosses", "Color": "#ffdcd2"},
+    150: {
+        "Landcover": "Sparse vegetation (tree, shrub, herbaceous cover) (<15%)",
+        "Color": "#ffebaf",
+    },
+    151: {"Landcover": "Sparse tree (<15%)", "Color": "#ffc864"},
+    152: {"Landcover": "Sparse shrub (<15%)", "Color": "#ffd278"},
+    153: {"Landcover": "Sparse herbaceous cover (<15%)", "Color": "#ffebaf"},
+    160: {"Landcover": "Tree cover, flooded, fresh, or brackish water", "Color": "#00785a"},
+    170: {"Landcover": "Tree cover, flooded, saline water", "Color": "#009678"},
+    180: {
+        "Landcover": "Shrub or herbaceous cover, flooded, fresh/saline/brackish water",
+        "Color": "#00dc82",
+    },
+    190: {"Landcover": "Urban areas", "Color": "#c31400"},
+    200: {"Landcover": "Bare areas ", "Color": "#fff5d7"},
+    201: {"Landcover": "Consolidated bare areas", "Color": "#dcdcdc"},
+    202: {"Landcover": "Unconsolidated bare areas", "Color": "#fff5d7"},
+    210: {"Landcover": "Water bodies", "Color": "#0046c8", "Opacity": 0},
+    220: {"Landcover": "Permanent snow and ice ", "Color": "#ffffff"},
+}
+
+
+def _build_landcover_palette(info):
+    """
+    Builds the SLD style, the class colors and the class names from the land cover info
+    in a single pass.
+
+    Args:
+        info (dict): A dictionary mapping int class IDs to their land cover name, color and opacity.
+
+    Returns:
+        tuple: A tuple containing the SLD style, the class colors and the class names.
+    """
+    entries = []
+    colors = {}
+    names = {}
+    for code, value in info.items():
+        opacity = f' opacity="{value["Opacity"]}"' if "Opacity" in value else ""
+        entries.append(f'<ColorMapEntry color="{value["Color"]}" quantity="{code}"{opacity} />')
+        colors[code] = value["Color"]
+        names[code] = value["Landcover"]
+
+    sld = "".join(
+        [
+            "<RasterSymbolizer>",
+            '<ColorMap type="values" extended="false">',
+            *entries,
+            "</ColorMap>",
+            "</RasterSymbolizer>",
+        ]
+    )
+    return sld, colors, names
+
+
+_SLD_XML, _COLORS, _NAMES = _build_landcover_palette(landcover_info)
+
+# Color ramp of the SOC stock change, mapping the change quantity to its color
+soc_change_ramp = {
+    -10: "#B30200",
+    -7.5: "#E34A33",
+    -5: "#FC8D59",
+    -2.5: "#FDCC8A",
+    0: "#FFFFCC",
+    2.5: "#A1DAB4",
+    5: "#31B3BD",
+    7.5: "#1C9099",
+    10: "#066C59",
+}
+
+_SOC_SLD_XML = "".join(
+    [
+        "<RasterSymbolizer>",
+        '<ColorMap extended="false" type="ramp">',
+        *(
+            f'<ColorMapEntry color="{color}" quantity="{quantity}" />'
+            for quantity, color in soc_change_ramp.items()
+        ),
+        "</ColorMap>",
+        "</RasterSymbolizer>",
+    ]
+)
@@ -1,7 +1,37 @@
-from typing import List
+from typing import List, Tuple
 import folium
+import streamlit as st
 from folium.plugins import Draw
 
+from .data_params import GEEData
+
+# Seconds the GEE tiles URLs are cached for, GEE map IDs are temporary so they are refreshed
+# well before they expire
+GEE_TILES_TTL = 3600
+
+
+@st.cache_resource(ttl=GEE_TILES_TTL, show_spinner=False)
+def _resolve_gee_tiles(dataset_name: str, year: str) -> Tuple[str, str]:
+    """
+    Resolves the tiles URL and layer name of a GEE dataset, at most once per GEE_TILES_TTL.
+
+    The call is keyed on the dataset name and year because ee.Image objects are not hashable.
+
+    Parameters:
+    dataset_name: str
+        The name of the dataset (see GEEData).
+    year: str
+        The year of the image to display.
+
+    Returns:
+    tuple: The tiles URL and the layer name.
+    """
+    dataset = GEEData(dataset_name)
+    image = dataset.ee_image(year).sldStyle(dataset.sld_interval)
+    mapid = image.getMapId()
+    tiles_url = "{tile_fetcher.url_format}".format(**mapid)
+    return tiles_url, dataset.layer_name(year)
+
 
 class FoliumMap(folium.Map):
     """
@@ -49,26 +79,26 @@ class FoliumMap(folium.Map):
 
         draw.add_to(self)
 
-    def add_gee_layer(self, dataset, year="2018"):
+    def add_gee_layer(self, dataset, year="2018", show=True):
         """
         Adds a Google Earth Engine layer to the map.
 
         Parameters:
         dataset (GEEData): A GEEData object containing the land cover data
         year (str, optional): The year of the image to display. Defaults to '2018'.
+        show (bool, optional): Whether the layer is visible when the map loads. Hidden layers
+            fetch no tiles until they are enabled in the layer control. Defaults to True.
         """
-        image = dataset.ee_image(year)
-        sld_interval = dataset.sld_interval
-        name = dataset.layer_name(year)
-
-        ee_tiles = "{tile_fetcher.url_format}"
-
-        image = image.sldStyle(sld_interval)
-        mapid = image.getMapId()
-        tiles_url = ee_tiles.format(**mapid)
+        tiles_url, name = _resolve_gee_tiles(dataset.dataset, year)
 
         tile_layer = folium.TileLayer(
-            tiles=tiles_url, name=name, attr=name, overlay=True, control=True, opacity=1
+            tiles=tiles_url,
+            name=name,
+            attr=name,
+            overlay=True,
+            control=True,
+            opacity=1,
+            show=show,
         )
 
         tile_layer.add_to(self)
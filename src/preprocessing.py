@@ -0,0 +1,146 @@
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+
+import ee
+from google.cloud import storage
+
+# Global extent and resolution (~300 m) of the ESA CCI land cover maps
+GDALWARP_ARGS = [
+    # Cloud Optimized GeoTIFFs, so GEE can read them from Cloud Storage
+    "-of", "COG",
+    # 512 x 512 tiles for block-aligned reads, ZSTD with horizontal differencing
+    # compresses the byte class rasters better than LZW and decodes faster
+    "-co", "BLOCKSIZE=512",
+    "-co", "COMPRESS=ZSTD",
+    "-co", "PREDICTOR=YES",
+    "-ot", "Byte",
+    "-te", "-180.0000000", "-90.0000000", "180.0000000", "90.0000000",
+    "-tr", "0.002777777777778", "0.002777777777778",
+    "-t_srs", "EPSG:4326",
+    # Overlap I/O and computation within each gdalwarp
+    "-multi",
+]  # fmt: skip
+
+
+def _run_gdalwarp(input_nc: str, output_tif: str, num_threads: int = 1):
+    """
+    Converts the land cover class variable of a NetCDF file to a GeoTIFF with gdalwarp.
+
+    Module-level so it can be pickled by the process pool.
+
+    Args:
+        input_nc (str): The path of the NetCDF file.
+        output_tif (str): The path of the GeoTIFF file to write.
+        num_threads (int, optional): The number of warping threads of gdalwarp. Defaults to 1.
+    """
+    subprocess.run(
+        [
+            "gdalwarp",
+            *GDALWARP_ARGS,
+            "-wo",
+            f"NUM_THREADS={num_threads}",
+            f"NETCDF:{input_nc}:lccs_class",
+            output_tif,
+        ],
+        check=True,
+    )
+
+
+class LandcoverDataProcessor:
+    """
+    A class for preparing the ESA CCI land cover maps before they are uploaded to GEE.
+
+    Attributes:
+        input_nc_files (list): The paths of the NetCDF land cover maps.
+        output_tif_files (list): The paths of the GeoTIFF files to write, one per input file.
+
+    Methods:
+        convert_nc_to_tif():
+            Converts the NetCDF land cover maps to GeoTIFF files.
+
+        upload_to_gee(bucket_name, asset_ids, years):
+            Uploads the GeoTIFF files to Cloud Storage and ingests them as GEE assets.
+
+    Usage:
+        processor = LandcoverDataProcessor(input_nc_files, output_tif_files)
+        processor.convert_nc_to_tif()
+        tasks = processor.upload_to_gee(bucket_name, asset_ids, years)
+    """
+
+    def __init__(self, input_nc_files: List[str], output_tif_files: List[str]):
+        if len(input_nc_files) != len(output_tif_files):
+            raise ValueError("There must be one output GeoTIFF file per input NetCDF file")
+        self.input_nc_files = input_nc_files
+        self.output_tif_files = output_tif_files
+
+    def convert_nc_to_tif(self):
+        """
+        Converts the NetCDF land cover maps to GeoTIFF files.
+
+        The gdalwarp runs are CPU bound and independent, so they run in a process pool.
+        The CPUs are shared between the workers, each gdalwarp gets its share as threads.
+        """
+        cpu_count = os.cpu_count() or 2
+        max_workers = max(1, min(len(self.input_nc_files), cpu_count // 2))
+        num_threads = [max(1, cpu_count // max_workers)] * len(self.input_nc_files)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(_run_gdalwarp, self.input_nc_files, self.output_tif_files, num_threads)
+            )
+
+    def upload_to_gee(
+        self, bucket_name: str, asset_ids: List[str], years: List[str], max_workers: int = 8
+    ):
+        """
+        Uploads the GeoTIFF files to Cloud Storage and ingests them as GEE assets.
+
+        The files are uploaded concurrently, then every asset is exported in-process with
+        ee.batch, so all the tasks share one authenticated session. The land cover band is
+        named b1, the band the analyzers read, where the earthengine upload commands of the
+        notebook named it band1. Each asset starts on January 1st of its year, as the readers
+        of the land cover collection select the images by date.
+
+        Args:
+            bucket_name (str): The Cloud Storage bucket to upload the GeoTIFF files to.
+            asset_ids (list): The GEE asset IDs, one per GeoTIFF file.
+            years (list): The years of the land cover maps, one per GeoTIFF file.
+            max_workers (int, optional): The maximum number of concurrent uploads. Defaults to 8.
+
+        Returns:
+            list: The started ee.batch.Task objects.
+        """
+        if len(asset_ids) != len(self.output_tif_files):
+            raise ValueError("There must be one asset ID per GeoTIFF file")
+        if len(years) != len(self.output_tif_files):
+            raise ValueError("There must be one year per GeoTIFF file")
+
+        bucket = storage.Client().bucket(bucket_name)
+
+        def upload(output_tif):
+            blob = bucket.blob(os.path.basename(output_tif))
+            blob.upload_from_filename(output_tif)
+            return f"gs://{bucket_name}/{blob.name}"
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            uris = list(executor.map(upload, self.output_tif_files))
+
+        tasks = []
+        for uri, asset_id, year in zip(uris, asset_ids, years):
+            # loadGeoTIFF names the band B0, rename it to the b1 band of the land cover assets.
+            # Class 0 is no data, as with the earthengine upload --nodata_value=0 option
+            image = ee.Image.loadGeoTIFF(uri).rename("b1")
+            image = image.updateMask(image.neq(0))
+            image = image.set("system:time_start", ee.Date(f"{year}-01-01").millis())
+            task = ee.batch.Export.image.toAsset(
+                image=image,
+                description=os.path.basename(asset_id),
+                assetId=asset_id,
+                # The classes are categorical, averaging them would make up classes
+                pyramidingPolicy={".default": "mode"},
+                maxPixels=1e13,
+            )
+            task.start()
+            tasks.append(task)
+        return tasks
@@ -1,7 +1,148 @@
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
 import ee
 import matplotlib.pyplot as plt
+import numpy as np
 import plotly.graph_objects as go
 
+from .color_palettes import soc_change_ramp
+
+# GEE requests are I/O bound, many of them can be in flight on the high-volume endpoint
+MAX_WORKERS = 40
+
+
+def compute_histograms(tasks, max_workers=MAX_WORKERS):
+    """
+    Evaluates GEE histograms concurrently instead of one request after the other.
+
+    Args:
+        tasks (list): The ee.ComputedObject histograms to evaluate.
+        max_workers (int, optional): The maximum number of concurrent requests.
+                                     Defaults to MAX_WORKERS.
+
+    Returns:
+        list: The evaluated histograms, in the order of the tasks.
+    """
+    if not tasks:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        return list(executor.map(lambda task: task.getInfo(), tasks))
+
+
+def _geometry_key(geometry):
+    """
+    Returns a hashable key of a geometry.
+
+    Args:
+        geometry (dict or ee.Geometry): The geometry.
+
+    Returns:
+        str: The serialized geometry.
+    """
+    if isinstance(geometry, ee.ComputedObject):
+        return geometry.serialize()
+    return json.dumps(geometry, sort_keys=True)
+
+
+def _lookup_array(mapping):
+    """
+    Converts a dictionary keyed by int class IDs to an array indexed by class ID.
+
+    Args:
+        mapping (dict): A dictionary mapping int class IDs to values.
+
+    Returns:
+        numpy.ndarray: An object array holding the value of each class ID at its index,
+                       and None at the indices of the missing class IDs.
+    """
+    array = np.full(max(mapping, default=-1) + 1, None, dtype=object)
+    for key, value in mapping.items():
+        array[key] = value
+    return array
+
+
+def _lookup(array, keys):
+    """
+    Looks up the values of int class IDs in an array built by _lookup_array.
+
+    Args:
+        array (numpy.ndarray): The object array indexed by class ID.
+        keys (numpy.ndarray): The int class IDs to look up.
+
+    Returns:
+        numpy.ndarray: An object array holding the value of each class ID.
+
+    Raises:
+        KeyError: If a class ID has no value, as with the dictionary the array was built from.
+    """
+    in_range = (keys >= 0) & (keys < len(array))
+    values = np.full(keys.size, None, dtype=object)
+    values[in_range] = array[keys[in_range]]
+    unknown = keys[np.equal(values, None)]
+    if unknown.size:
+        raise KeyError(f"Unknown class IDs: {unknown.tolist()}")
+    return values
+
+
+def _tile_geometry(geometry, n):
+    """
+    Splits the bounding box of a geometry into an n x n grid of tiles clipped to the geometry.
+
+    Args:
+        geometry (dict): The GeoJSON polygon to split.
+        n (int): The number of tiles along each side of the bounding box.
+
+    Returns:
+        list: The n * n tiles as ee.Geometry objects.
+    """
+    coordinates = geometry["coordinates"][0]
+    lons = [coordinate[0] for coordinate in coordinates]
+    lats = [coordinate[1] for coordinate in coordinates]
+    lon_min, lat_min = min(lons), min(lats)
+    width = (max(lons) - lon_min) / n
+    height = (max(lats) - lat_min) / n
+
+    region = ee.Geometry(geometry)
+    tiles = []
+    for i in range(n):
+        for j in range(n):
+            tile = ee.Geometry.Rectangle(
+                [
+                    lon_min + i * width,
+                    lat_min + j * height,
+                    lon_min + (i + 1) * width,
+                    lat_min + (j + 1) * height,
+                ]
+            )
+            tiles.append(tile.intersection(region, maxError=1))
+    return tiles
+
+
+def _histogram_core(image, geometry, scale=250):
+    """
+    Returns the frequency histogram of an image within a geometry, without evaluating it.
+
+    Args:
+        image (ee.Image): The image to reduce.
+        geometry (dict or ee.Geometry): The geometry to reduce the image over.
+        scale (int, optional): The scale of the reduction in meters. Defaults to 250.
+
+    Returns:
+        ee.Dictionary: The frequency histogram, to be evaluated with getInfo().
+    """
+    # reduceRegion only reads the pixels within the geometry, clipping the image first
+    # would only add a mask operation. The regions are small (or split into tiles),
+    # so the pixel cap can be lifted
+    return image.reduceRegion(
+        reducer=ee.Reducer.frequencyHistogram(),
+        geometry=geometry,
+        scale=scale,
+        bestEffort=False,
+        maxPixels=1e13,
+    )
+
 
 class LandcoverAnalyzer:
     """
@@ -9,11 +150,18 @@ class LandcoverAnalyzer:
 
     Attributes:
         dataset (GEEData): A GEEData object containing the land cover data.
+        data (dict, optional): A previously calculated frequency histogram of the land cover data.
 
     Methods:
-        calculate_frequency_histogram(geometry, year=None):
+        frequency_histogram(geometry, year=None):
+            Returns the unevaluated frequency histogram of the land cover data.
+
+        calculate_frequency_histogram(geometry, year=None, tiles=1):
             Calculates the frequency histogram of the land cover data for a given geometry and year.
 
+        calculate_frequency_histograms(geometry, years, tiles=1):
+            Calculates the frequency histograms of the land cover data for several years at once.
+
         display_pie_chart_matplotlib(data, title):
             Displays a pie chart of the land cover data using the Matplotlib library.
 
@@ -37,12 +185,35 @@ class LandcoverAnalyzer:
         lc_analyzer.display_pie_chart_plotly(data, title)
     """
 
-    def __init__(self, dataset):
+    def __init__(self, dataset, data=None):
         self.dataset = dataset
+        self.data = data
+        # Evaluated histograms, keyed by (year, geometry key, tiles)
+        self._histograms = {}
+        # Class names and colors indexed by int class ID
+        self._name_arr = _lookup_array(self.class_names)
+        self._color_arr = _lookup_array(self.class_colors)
+        # Figures reused by repeated chart renders
+        self._fig = None
+        self._ax = None
+        self._plotly_fig = None
 
-    def calculate_frequency_histogram(self, geometry, year=None):
+    @property
+    def data(self):
         """
-        Calculates the frequency histogram of the land cover data for a given geometry and year.
+        The frequency histogram of the land cover data, setting it invalidates the prepared data.
+        """
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._prepared = None
+
+    def frequency_histogram(self, geometry, year=None):
+        """
+        Returns the frequency histogram of the land cover data for a given geometry and year,
+        without evaluating it.
 
         Args:
             geometry (dict): The geometry to calculate the frequency histogram for.
@@ -50,19 +221,85 @@ class LandcoverAnalyzer:
                                   Defaults to None.
 
         Returns:
-            dict: A dictionary containing the frequency histogram data.
+            ee.Dictionary: The frequency histogram, to be evaluated with getInfo().
         """
         ee_image = self.dataset.ee_image(year=year) if year else self.dataset.ee_image()
-        ee_image = ee_image.clip(geometry)
+        return _histogram_core(ee_image, geometry)
 
-        lc_histogram = ee_image.reduceRegion(
-            reducer=ee.Reducer.frequencyHistogram(),
-            geometry=geometry,
-            scale=250,
-        )
-        self.data = lc_histogram.getInfo().get("b1")
+    def calculate_frequency_histogram(self, geometry, year=None, tiles=1):
+        """
+        Calculates the frequency histogram of the land cover data for a given geometry and year.
+
+        Args:
+            geometry (dict): The geometry to calculate the frequency histogram for.
+            year (str, optional): The year to calculate the frequency histogram for.
+                                  Defaults to None.
+            tiles (int, optional): Splits the geometry into a tiles x tiles grid whose histograms
+                                   are calculated concurrently and merged. Defaults to 1.
+
+        Returns:
+            dict: A dictionary mapping int class IDs to their pixel counts.
+        """
+        # Repeated calls for the same geometry, year and tiles do not query GEE again
+        key = (year, _geometry_key(geometry), tiles)
+        if key not in self._histograms:
+            if tiles > 1:
+                histogram = self.calculate_frequency_histograms(geometry, [year], tiles)[year]
+            else:
+                result = self.frequency_histogram(geometry, year).getInfo()
+                histogram = self._to_class_counts(result)
+            self._histograms[key] = histogram
+        self.data = self._histograms[key]
         return self.data
 
+    def calculate_frequency_histograms(self, geometry, years, tiles=1):
+        """
+        Calculates the frequency histograms of the land cover data for a given geometry
+        and several years. The tiles are evaluated concurrently, one GEE request per tile
+        for all the years.
+
+        Args:
+            geometry (dict): The geometry to calculate the frequency histograms for.
+            years (list): The years to calculate the frequency histograms for.
+            tiles (int, optional): Splits the geometry into a tiles x tiles grid whose histograms
+                                   are calculated concurrently and merged. Defaults to 1.
+
+        Returns:
+            dict: A dictionary mapping each year to its frequency histogram.
+        """
+        regions = _tile_geometry(geometry, tiles) if tiles > 1 else [geometry]
+        # Each tile stays its own request, within the compute limits of one request,
+        # but the histograms of all the years of a tile share its round trip
+        tasks = [
+            ee.List([self.frequency_histogram(region, year) for year in years])
+            for region in regions
+        ]
+        results = compute_histograms(tasks)
+
+        histograms = {}
+        for i, year in enumerate(years):
+            # Add up the pixel counts of the tiles of the year
+            counts = Counter()
+            for tile_results in results:
+                counts.update(self._to_class_counts(tile_results[i]))
+            histograms[year] = dict(counts)
+        return histograms
+
+    @staticmethod
+    def _to_class_counts(result):
+        """
+        Converts an evaluated frequency histogram to a dictionary of pixel counts.
+
+        Args:
+            result (dict): The evaluated frequency histogram.
+
+        Returns:
+            dict: A dictionary mapping int class IDs to their pixel counts.
+        """
+        # GEE returns the class IDs as strings, convert them once to int
+        histogram = result.get("b1") or {}
+        return {int(key): value for key, value in histogram.items()}
+
     def _prepare_data(self):
         """
         Prepares the data for display in a pie chart by calculating the percentages for each class.
@@ -73,14 +310,18 @@ class LandcoverAnalyzer:
         Returns:
             tuple: A tuple containing the labels, percentages, and colors for each class.
         """
-        values = list(self.data.values())
-        total = sum(values)
-        labels = list(self.data.keys())
-        labels = [self.class_names[key] for key in self.data.keys()]
-        colors = [self.class_colors[key] for key in self.data.keys()]
-        percentages = [100 * value / total for value in values]
-
-        return labels, percentages, colors
+        # The prepared data is reused until self.data is set again
+        if self._prepared is None:
+            keys = np.fromiter(self.data.keys(), dtype=np.int32, count=len(self.data))
+            values = np.fromiter(self.data.values(), dtype=np.float64, count=len(self.data))
+            # An empty histogram has no percentages instead of dividing by a zero total
+            total = values.sum()
+            percentages = values * (100.0 / total) if total else np.zeros_like(values)
+            labels = _lookup(self._name_arr, keys)
+            colors = _lookup(self._color_arr, keys)
+            self._prepared = labels, percentages, colors
+
+        return self._prepared
 
     def get_pie_chart_plotly(self, title):
         """
@@ -109,9 +350,13 @@ class LandcoverAnalyzer:
         """
         labels, percentages, colors = self._prepare_data()
 
-        fig, ax = plt.subplots(figsize=(8, 8))
-        ax.pie(percentages, labels=labels, colors=colors, autopct="%1.1f%%")
-        ax.set_title(title)
+        # Reuse the figure while it is open, Jupyter closes it once it is displayed
+        if self._fig is None or not plt.fignum_exists(self._fig.number):
+            self._fig, self._ax = plt.subplots(figsize=(8, 8))
+        else:
+            self._ax.clear()
+        self._ax.pie(percentages, labels=labels, colors=colors, autopct="%1.1f%%")
+        self._ax.set_title(title)
         plt.show()
 
     def display_pie_chart_plotly(self, title):
@@ -121,8 +366,16 @@ class LandcoverAnalyzer:
         Args:
             title (str): The title of the pie chart.
         """
-        fig = self.get_pie_chart_plotly(title)
-        fig.show()
+        # Reuse the displayed figure, only its pie and title are updated
+        if self._plotly_fig is None:
+            self._plotly_fig = self.get_pie_chart_plotly(title)
+        else:
+            labels, percentages, colors = self._prepare_data()
+            self._plotly_fig.update_traces(
+                labels=labels, values=percentages, marker=dict(colors=colors)
+            )
+            self._plotly_fig.update_layout(title=title)
+        self._plotly_fig.show()
 
     @property
     def class_names(self):
@@ -147,6 +400,17 @@ class LandcoverComparison:
         self.category_colors = category_colors
         self.changes = {category: self.calculate_change(category) for category in self.categories}
         self.class_names = class_names  # Include class_names attribute
+        # Name, change, color and label of the bars, categories with 0% change are filtered out
+        self._bar = [
+            (
+                self.class_names.get(category, category),
+                change,
+                category_colors[category],
+                f"{change:.2f}%",
+            )
+            for category, change in self.changes.items()
+            if change != 0
+        ]
 
     def calculate_change(self, category):
         return (
@@ -156,25 +420,17 @@ class LandcoverComparison:
         )
 
     def generate_comparison_chart(self, title):
-        # Filter out categories with 0% change
-        non_zero_categories = [
-            category for category in self.categories if self.changes[category] != 0
-        ]
+        names, changes, colors, texts = zip(*self._bar) if self._bar else ((), (), (), ())
 
         # Create a bar chart using Plotly
         fig = go.Figure()
 
         fig.add_trace(
             go.Bar(
-                x=[self.class_names.get(category, category) for category in non_zero_categories],
-                y=[self.changes[category] for category in non_zero_categories],
-                marker=dict(
-                    color=[self.category_colors[category] for category in non_zero_categories]
-                ),
-                text=[
-                    f"{change:.2f}%"
-                    for change in [self.changes[category] for category in non_zero_categories]
-                ],
+                x=names,
+                y=changes,
+                marker=dict(color=colors),
+                text=texts,
                 textposition="auto",
             )
         )
@@ -182,10 +438,8 @@ class LandcoverComparison:
         fig.update_layout(
             xaxis=dict(
                 tickmode="array",
-                tickvals=list(range(len(non_zero_categories))),
-                ticktext=[
-                    self.class_names.get(category, category) for category in non_zero_categories
-                ],
+                tickvals=list(range(len(names))),
+                ticktext=names,
                 tickangle=45,
                 tickfont=dict(size=12),
             ),
@@ -204,39 +458,46 @@ class LandcoverComparison:
 
 
 class CarbonStockAnalyzer:
-    def __init__(self, dataset):
+    # Categories of the carbon stock change, classified server-side
+    LOSSES, NO_CHANGE, GAINS = 0, 1, 2
+    # Changes within +/- CHANGE_THRESHOLD count as no change
+    CHANGE_THRESHOLD = 2.5
+
+    def __init__(self, dataset, data=None):
         self.dataset = dataset
-        self.data = None
+        self.data = data
 
-    def calculate_frequency_histogram(self, geometry, year=None):
+    def frequency_histogram(self, geometry, year=None):
         ee_image = self.dataset.ee_image(year=year) if year else self.dataset.ee_image()
-        ee_image = ee_image.clip(geometry)
 
-        lc_histogram = ee_image.reduceRegion(
-            reducer=ee.Reducer.frequencyHistogram(),
-            geometry=geometry,
-            scale=250,
-        )
-        self.data = lc_histogram.getInfo().get("b1")
-        return self.data
-
-    def categorize_counts(self):
-        # Convert the category values to numbers
-        values = [float(value) for value in self.data.keys()]
+        # Classify the pixels into the three categories before reducing,
+        # so GEE returns three counts instead of one count per distinct value
+        categories = ee_image.expression(
+            "b('b1') < -threshold ? losses : (b('b1') > threshold ? gains : no_change)",
+            {
+                "threshold": self.CHANGE_THRESHOLD,
+                "losses": self.LOSSES,
+                "no_change": self.NO_CHANGE,
+                "gains": self.GAINS,
+            },
+        ).rename("b1")
 
-        # Categorize based on the sign of the values
-        losses = sum(1 for value in values if value < -2.5)
-        no_change = sum(1 for value in values if -2.5 <= value <= 2.5)
-        gains = sum(1 for value in values if value > 2.5)
+        return _histogram_core(categories, geometry)
 
-        return losses, no_change, gains
+    def calculate_frequency_histogram(self, geometry, year=None):
+        histogram = self.frequency_histogram(geometry, year).getInfo().get("b1") or {}
+        self.data = {int(float(key)): value for key, value in histogram.items()}
+        return self.data
 
     def get_stackbar_chart_plotly(self, title="Carbon Stock Change (2000-2018))"):
-        losses, no_change, gains = self.categorize_counts()
+        losses = self.data.get(self.LOSSES, 0)
+        no_change = self.data.get(self.NO_CHANGE, 0)
+        gains = self.data.get(self.GAINS, 0)
         total = losses + no_change + gains
 
         percentages = [losses / total * 100, no_change / total * 100, gains / total * 100]
-        colors = ["#B30200", "#FFFFCC", "#066C59"]  # Red, Yellow, Green
+        # Red, Yellow, Green
+        colors = [soc_change_ramp[-10], soc_change_ramp[0], soc_change_ramp[10]]
 
         fig = go.Figure()
 
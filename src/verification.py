@@ -1,18 +1,14 @@
 import logging
-from math import sqrt
 from typing import List
 
 log = logging.getLogger(__name__)
 
 
-def _get_distance(c1: List[float], c2: List[float]) -> float:
-    return sqrt((c1[0] - c2[0]) ** 2 + (c1[1] - c2[1]) ** 2)
-
-
 def _get_area(bbox: List[List[float]]) -> float:
-    width = _get_distance(c1=bbox[0], c2=bbox[1])
-    height = _get_distance(c1=bbox[1], c2=bbox[2])
-    return round(abs(width * height), 2)
+    # the draw control only allows rectangles, so the envelope of the corners is the bbox
+    lons = [coordinate[0] for coordinate in bbox]
+    lats = [coordinate[1] for coordinate in bbox]
+    return round((max(lons) - min(lons)) * (max(lats) - min(lats)), 2)
 
 
 def selected_bbox_too_large(geometry: dict, threshold: float) -> bool: